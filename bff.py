@@ -8,6 +8,33 @@ This module contains:
 Raises:
   ValueError on invalid tokens or malformed lines.
 """
+import re
+
+# Cell letters that mark fixed blocks in a grid row
+_FIXED_RE = re.compile('[ABC]')
+
+# Valid grid cell tokens
+_GRID_CELLS = frozenset(('o', 'x', 'A', 'B', 'C'))
+
+# A GRID START ... GRID STOP section (a missing GRID STOP runs to end of file)
+_GRID_RE = re.compile(r'^[ \t]*GRID START[ \t]*$(.*?)(?:^[ \t]*GRID STOP[ \t]*$|\Z)',
+                      re.M | re.S | re.I)
+
+# A block count, laser or target line: its letter, then the rest of the line
+# up to any inline comment
+_ENTRY_RE = re.compile(r'^[ \t]*([ABCLP])(?![^\s#])([^\n#]*)', re.M)
+
+
+def _check_blank(text):
+    """
+    Raise ValueError if any line of text is not blank or a comment.
+
+    Used on the text between the entries _ENTRY_RE matches, so lines it
+    cannot parse (e.g. 'Lx 1 2 3 4' or 'A2') are reported, not skipped.
+    """
+    for line in text.splitlines():
+        if line.split('#')[0].strip():
+            raise ValueError("Unrecognized line: %r" % line.strip())
 
 class Board(object):
     """
@@ -23,12 +50,27 @@ class Board(object):
     Typical usage: produced by parse_bff(path) and passed to solver/laser code.
     """
 
+    # fixed attribute layout: no per-instance __dict__, faster attribute loads
+    # ('blocks' is an optional explicit block map, see solver.py)
+    __slots__ = ('grid', 'movable_counts', 'lasers', 'targets', 'blocks')
+
     def __init__(self, grid, movable_counts, lasers, targets): # initialize Board
         self.grid = grid # 2D list of grid cells
         self.movable_counts = movable_counts # dict of movable block counts
         self.lasers = lasers # list of lasers (x, y, vx, vy)
         self.targets = targets # list of targets (x, y)
 
+    def copy_for_trial(self):
+        """
+        Return a new Board whose grid can be changed without touching this one.
+
+        Grid rows are copied; lasers, targets and movable_counts are shared,
+        since they are never modified while solving. An explicit block map
+        (`blocks`) is not carried over.
+        """
+        return Board([row[:] for row in self.grid], self.movable_counts,
+                     self.lasers, self.targets)
+
     def size(self): # return board dimensions
         """
         Return (rows, cols) of the block grid.
@@ -40,10 +82,10 @@ class Board(object):
         Return a dict {(r,c): 'A'/'B'/'C'} for fixed blocks present in the grid.
         """
         fixed = {} # initialize empty dict
-        for r, row in enumerate(self.grid): 
-            for c, cell in enumerate(row):
-                if cell in ('A', 'B', 'C'):
-                    fixed[(r, c)] = cell
+        for r, row in enumerate(self.grid):
+            # scan the whole row as one string instead of cell by cell
+            for m in _FIXED_RE.finditer(''.join(row)):
+                fixed[(r, m.start())] = m.group()
         return fixed # return dict of fixed blocks
 
     def placeable_slots(self):
@@ -52,90 +94,70 @@ class Board(object):
         """
         slots = []
         for r, row in enumerate(self.grid):
-            for c, cell in enumerate(row):
-                if cell == 'o': # if cell is empty
-                    slots.append((r, c)) # add to slots list
+            line = ''.join(row) # one character per cell
+            c = line.find('o')
+            while c != -1: # each empty cell in this row
+                slots.append((r, c)) # add to slots list
+                c = line.find('o', c + 1)
         return slots # return list of slots
 
 def parse_bff(path):
     """
     Parses a .bff file from disk and returns a Board object
 
+    The file is read once and scanned with precompiled regular expressions:
+    one finds each GRID START/GRID STOP section, the other finds every
+    block count (A/B/C), laser (L) and target (P) line outside of them.
+    Comment lines (starting with '#') and inline comments are ignored; any
+    other line outside a grid section raises ValueError.
+
     Parameters
         path: str
     Returns
         Board: Board(grid, movable_counts, lasers, targets)
     """
-    with open(path, 'r', encoding='utf-8') as bff_file:
-        lines = [ln.strip() for ln in bff_file]
-
     grid = []
     lasers = []
     targets = []
     counts = {'A': 0, 'B': 0, 'C': 0}
-    in_grid = False # flag for grid section
-    i = 0 # line index
 
-    def is_comment_or_blank(string): 
-        """
-        Checks if line is comment or blank
-
-        Parameters
-            string: str
-
-        Returns
-            Boolean
-        """
-        if len(string) == 0:
-            return True
-        if string[0] == '#':
-            return True
-        return False 
-
-    while i < len(lines): # iterate through lines
-        s = lines[i]
-        i += 1
-        if is_comment_or_blank(s): # skip comments and blank lines
-            continue
-        if s.upper() == 'GRID START': # start of grid section
-            while i < len(lines):
-                row = lines[i].strip()
-                i += 1
-                if row.upper() == 'GRID STOP': # end of grid section
-                    break
-                if is_comment_or_blank(row): # skip comments and blank lines
-                    continue
-                
-                if '#' in row:
-                  row = row.split('#')[0].strip()
-                  
-                cells = row.split() # split row into cells
-                for c in cells:
-                    if c not in ('o', 'x', 'A', 'B', 'C'): # validate cell
-                        raise ValueError("Invalid grid cell: {c!r}") # raise error for invalid cell
-                grid.append(cells)
-            continue
-
-        if s[0] in 'ABC': # block count line
-            p = s.split()
-            counts[p[0]] = int(p[1])
-            continue
-
-        if s.startswith('L'): # laser line
-            p = s.split()
-            if len(p) < 5:
-                raise ValueError("Laser line needs 4 integers: %r" % s) # validate laser line
-            x, y = int(p[1]), int(p[2])
-            vx, vy = int(p[3]), int(p[4])
-            lasers.append((x, y, vx, vy)) # add laser to list
-            continue
-
-        if s.startswith('P'):
-            p = s.split()
-            if len(p) < 3:
-                raise ValueError("Target line needs 2 integers: %r" % s) # validate target line
-            x, y = int(p[1]), int(p[2])
-            targets.append((x, y)) # add target to list
-            continue
+    with open(path, 'r', encoding='utf-8') as bff_file:
+        text = bff_file.read()
+
+    rest = [] # file text outside of grid sections
+    pos = 0
+    for m in _GRID_RE.finditer(text): # each grid section
+        rest.append(text[pos:m.start()])
+        pos = m.end()
+        for row in m.group(1).splitlines():
+            cells = row.split('#')[0].split() # drop inline comments, split cells
+            if not cells: # skip comments and blank lines
+                continue
+            if not _GRID_CELLS.issuperset(cells): # validate cells
+                bad = next(c for c in cells if c not in _GRID_CELLS)
+                raise ValueError(f"Invalid grid cell: {bad!r}") # raise error for invalid cell
+            grid.append(cells)
+    rest.append(text[pos:])
+
+    rest = ''.join(rest)
+    pos = 0
+    for m in _ENTRY_RE.finditer(rest): # each count, laser and target line
+        _check_blank(rest[pos:m.start()]) # only comments and blank lines between entries
+        pos = m.end()
+        kind, p = m.group(1), m.group(2).split()
+
+        if kind == 'L': # laser line
+            if len(p) < 4:
+                raise ValueError("Laser line needs 4 integers: %r" % m.group(0).strip()) # validate laser line
+            lasers.append((int(p[0]), int(p[1]), int(p[2]), int(p[3]))) # add laser to list
+        elif kind == 'P': # target line
+            if len(p) < 2:
+                raise ValueError("Target line needs 2 integers: %r" % m.group(0).strip()) # validate target line
+            targets.append((int(p[0]), int(p[1]))) # add target to list
+        else: # block count line
+            if not p:
+                raise ValueError("Block count line needs 1 integer: %r" % m.group(0).strip()) # validate block count line
+            counts[kind] = int(p[0])
+    _check_blank(rest[pos:])
 
     return Board(grid, counts, lasers, targets) # return Board object
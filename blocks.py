@@ -2,7 +2,7 @@
 Defines block types for the Lazor puzzle and how each block type interacts with an
 incoming laser ray at an impact point.
 """
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional
 
 class Block:
     """
@@ -11,11 +11,15 @@ class Block:
     Attributes
         kind : str
             Single letter identifying the block type (e.g., 'A', 'B', 'C').
+        code : int
+            Small integer identifying the block type in dense grids (0 = no block).
     Methods
         interact(pos, dir, vert_edge)
             Return outgoing ray(s) after impact.
     """
+    __slots__ = ()  # stateless; no per-instance __dict__
     kind: str
+    code: int
     def interact(self, pos: Tuple[int, int], dir: Tuple[int, int], vert_edge: bool) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
         raise NotImplementedError
 
@@ -28,11 +32,15 @@ class ReflectBlock(Block):
     Attributes
         kind : str
             'A'
+        code : int
+            1
     Methods
         interact(pos, dir, vert_edge)
             Return one reflected ray with flipped vx (vertical edge) or vy (horizontal edge).
     """
+    __slots__ = ()
     kind = 'A'
+    code = 1
     def interact(self, pos: Tuple[int, int], dir: Tuple[int, int], vert_edge: bool):
         vx, vy = dir
         if vert_edge:
@@ -47,11 +55,15 @@ class OpaqueBlock(Block):
     Attributes
         kind : str
             'B'
+        code : int
+            2
     Methods
         interact(pos, dir, vert_edge)
             Returns an empty list (laser absorbed).
     """
+    __slots__ = ()
     kind = 'B'
+    code = 2
 
     def interact(self, pos: Tuple[int, int], dir: Tuple[int, int], vert_edge: bool):
         return [] #returns empty list(the laser is absorbed)
@@ -63,11 +75,15 @@ class RefractBlock(Block):
     Attributes
         kind : str
             'C'.
+        code : int
+            3
     Methods
         interact(pos, dir, vert_edge)
             Return two rays: straight-through and 90° reflection.
     """
+    __slots__ = ()
     kind = 'C'
+    code = 3
     def interact(self, pos: Tuple[int, int], dir: Tuple[int, int], vert_edge: bool):
         vx, vy = dir
         if vert_edge:
@@ -77,4 +93,7 @@ class RefractBlock(Block):
 
 BLOCKS: Dict[str, Block] = { 'A': ReflectBlock(), 'B': OpaqueBlock(), 'C': RefractBlock(),}
 
+# Block instances indexed by their code; index 0 means "no block".
+BLOCKS_BY_CODE: Tuple[Optional[Block], ...] = (None, BLOCKS['A'], BLOCKS['B'], BLOCKS['C'])
+
 
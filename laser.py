@@ -1,22 +1,33 @@
 # Laser Simulation (integrated with blocks.Block) #
 """
 Simulate lazor paths over a half-grid board using the interaction rules
-encapsulated in :mod:`blocks` Block classes. This module exports a single
-function:
+encapsulated in :mod:`blocks` Block classes. This module exports:
 
-    laser_path(board) -> list[set[(int, int)]]
+    iter_laser_paths(board) -> Iterator[HitSet]
+    laser_path(board) -> list[HitSet]
+    targets_covered(board, targets) -> bool
+    build_edge_tables(board) -> (tables, width)
+    update_edge_tables(edge_tables, r, c, val) -> None
 """
 from __future__ import annotations
 
-from typing import Dict, Tuple, List, Set, Optional, Iterable, Union
+from collections.abc import Set as _SetABC
+from typing import AbstractSet, Dict, Tuple, List, Set, Optional, Iterable, Iterator, Union
 
 # Use the official blocks module and its Block classes
-from blocks import BLOCKS, Block  # type: ignore
+from blocks import BLOCKS, BLOCKS_BY_CODE, Block  # type: ignore
 
 # Type aliases
 Pos = Tuple[int, int] # half-grid coordinate (x, y)
 Dir = Tuple[int, int] # lazor direction (vx, vy) where vx, vy ∈ {-1, +1}
-BlockMap = Dict[Pos, Block] # {(cx,cy) at odd,odd -> Block instance}
+Ray = Tuple[int, int, int, int] # lazor state (x, y, vx, vy)
+EdgeTables = Tuple[bytearray, ...] # per-direction flat tables of struck block codes
+
+
+# Which way an edge center faces, keyed by ((x & 1) << 1) | (y & 1): the
+# faced cell center is (x + dx*vx, y + dy*vy). Corners and cell centers
+# (x+y even) are not edges.
+_FACING = (None, (1, 0), (0, 1), None)
 
 
 def _board_dims(board) -> Tuple[int, int]: 
@@ -56,87 +67,257 @@ def _value_to_block(val: Union[str, Block, None]) -> Optional[Block]:
     return None
 
 
-def _grid_to_blockmap(board) -> BlockMap:
+def _dir_index(vx: int, vy: int) -> int:
+    """
+    Map a diagonal direction to 0..3: bit 1 is set for vx=+1, bit 0 for vy=+1.
+    """
+    return (vx + 1) | ((vy + 1) >> 1)
+
+
+def _build_transitions() -> Tuple[Tuple[Dir, ...], ...]:
+    """
+    Tabulate every block's `.interact()` result once at import time.
+
+    Returns
+        tuple[tuple[Dir, ...], ...]
+            Indexed by (code << 3) | (is_vert << 2) | _dir_index(vx, vy); each
+            entry lists the outgoing directions (empty when absorbed).
     """
-    Build a block map from either:
+    table: List[Tuple[Dir, ...]] = [()] * (len(BLOCKS_BY_CODE) << 3)
+    for blk in BLOCKS_BY_CODE[1:]:
+        for vert in (False, True):
+            for vx in (-1, 1):
+                for vy in (-1, 1):
+                    out = blk.interact((0, 0), (vx, vy), vert)
+                    key = (blk.code << 3) | (vert << 2) | _dir_index(vx, vy)
+                    table[key] = tuple(d for _, d in out)
+    return tuple(table)
+
+
+# Outgoing directions for every (block code, edge type, direction); the
+# tracer indexes this instead of calling interact() on each hit.
+_TRANSITIONS = _build_transitions()
+
+
+def build_edge_tables(board) -> Tuple[EdgeTables, int]:
+    """
+    Build per-direction edge lookup tables from either:
       - board.blocks (if present), or
       - board.grid (fallback)
-    The returned map uses cell centers at (2*c+1, 2*r+1) and concrete Block objects.
+
+    Each table is a flat, row-major bytearray over the half-grid with a
+    one-cell border of zeros, so point (x, y) lives at index
+    (y+1)*width + (x+1). Entry `tables[_dir_index(vx, vy)][i]` holds the
+    code of the block (0 = none, see :data:`blocks.BLOCKS_BY_CODE`) that a
+    ray at lattice point i moving in direction (vx, vy) strikes. Every block
+    writes its code to the four edge centers around it, once for each of
+    the two directions that approach that face.
+
+    The tables are a snapshot of the board: callers that change cells
+    afterwards (e.g. the solver) must keep them current with
+    `update_edge_tables`.
 
     Parameters
         Board
 
     Returns
-        dict[Pos, Block]
-            Mapping from cell centers (2*c+1, 2*r+1) to concrete Block objects.
+        tuple[tuple[bytearray, ...], int]
+            (tables, width) where width is the padded row length 2*cols+3.
     """
-    mp: BlockMap = {}
+    rows, cols = _board_dims(board)
+    max_x, max_y = 2 * cols, 2 * rows
+    width = max_x + 3
+    size = width * (max_y + 3)
+    tables: EdgeTables = tuple(bytearray(size) for _ in range(4))
 
     # Prefer an explicit mapping supplied by the solver
     maybe_map = getattr(board, "blocks", None)
     if isinstance(maybe_map, dict):
-        for pos, val in maybe_map.items():
-            blk = _value_to_block(val)
-            if blk is not None:
-                mp[pos] = blk
-        return mp
+        centers = maybe_map.items()
+    else:
+        # Fallback: derive from the grid itself
+        centers = [((2 * c + 1, 2 * r + 1), val)
+                   for r, row in enumerate(board.grid)
+                   for c, val in enumerate(row)]
 
-    # Fallback: derive from the grid itself
-    rows, cols = _board_dims(board)
-    for r in range(rows):
-        row = board.grid[r]
-        for c in range(cols):
-            val = row[c]
-            blk = _value_to_block(val)
-            if blk is not None:
-                cx, cy = 2 * c + 1, 2 * r + 1
-                mp[(cx, cy)] = blk
+    for (cx, cy), val in centers:
+        blk = _value_to_block(val)
+        if blk is not None and 0 <= cx <= max_x and 0 <= cy <= max_y:
+            _write_block(tables, width, cx, cy, blk.code)
+
+    return tables, width
+
+
+def _write_block(tables: EdgeTables, width: int, cx: int, cy: int, code: int) -> None:
+    """
+    Write a block code (0 to clear) onto the four faces of the cell
+    centered at (cx, cy) in the edge tables. Each (face, direction) entry
+    belongs to exactly one cell, so clearing never disturbs a neighbour.
+    """
+    t_ul, t_dl, t_ur, t_dr = tables  # (-1,-1), (-1,+1), (+1,-1), (+1,+1)
+    i = (cy + 1) * width + cx + 1
+    t_ur[i - 1] = t_dr[i - 1] = code          # left face, rays moving right
+    t_ul[i + 1] = t_dl[i + 1] = code          # right face, rays moving left
+    t_dl[i - width] = t_dr[i - width] = code  # top face, rays moving down
+    t_ul[i + width] = t_ur[i + width] = code  # bottom face, rays moving up
+
+
+def update_edge_tables(edge_tables: Tuple[EdgeTables, int], r: int, c: int,
+                       val: Union[str, Block, None]) -> None:
+    """
+    Update edge tables in place after grid cell (r, c) changed.
 
-    return mp
+    Parameters
+        edge_tables : tuple[tuple[bytearray, ...], int]
+            (tables, width) as returned by `build_edge_tables`.
+        r, c : int
+            Row and column of the changed cell.
+        val : str | Block | None
+            New cell value, e.g. 'A'/'B'/'C' for a block or 'o' for empty.
+    """
+    tables, width = edge_tables
+    blk = _value_to_block(val)
+    _write_block(tables, width, 2 * c + 1, 2 * r + 1, blk.code if blk else 0)
 
 
-def _edge_hit(blocks: BlockMap, x: int, y: int, vx: int, vy: int) -> Tuple[Optional[Block], Optional[bool]]:
+def _march(tables: EdgeTables, width: int, x: int, y: int, vx: int, vy: int,
+           max_x: int, max_y: int) -> Tuple[int, int, bool]:
     """
-    If (x,y) is exactly at a block edge center, return (block, vert_edge?).
-    Otherwise return (None, None).
+    March a ray along its straight segment until it reaches a block edge or
+    leaves the board, without visiting every half-step individually.
 
-    Half-grid geometry:
-      - Vertical edge centers are at (even, odd). The adjacent cell center is (x+vx, y).
-      - Horizontal edge centers are at (odd, even). The adjacent cell center is (x, y+vy).
+    The edge table for the ray's direction already says which block (if
+    any) each lattice point faces, so the whole run of points up to the
+    board edge is one strided slice of one bytearray; the first nonzero
+    byte in it is the next block hit, found by `lstrip` in C rather than
+    a Python loop. Rays with odd x+y only ever sit on edge centers,
+    alternating between vertical edges (even x) and horizontal edges (odd x).
 
     Parameters
-        blocks : dict[Pos, Block]
-            Lookup of block centers at odd,odd coordinates.
+        tables, width : tuple[bytearray, ...], int
+            Edge lookup tables from `build_edge_tables`.
         x, y : int
-            Current half-grid position of the ray.
+            Starting half-grid position of the segment (inside the board).
         vx, vy : int
-            Current direction components (±1).
+            Direction components (±1).
+        max_x, max_y : int
+            Inclusive bounds of the half-grid.
 
     Returns
-        tuple[Block | None, bool | None]
-            (block, is_vertical_edge). If no edge hit, returns (None, None).
+        tuple[int, int, bool]
+            (k, code, is_vertical_edge). The segment covers the points
+            (x + i*vx, y + i*vy) for i in 0..k. If code is 0 the ray
+            leaves the board after point k; otherwise it strikes the block
+            with that code at point k.
     """
-    # Vertical edge center
-    if x % 2 == 0 and y % 2 == 1:
-        target = (x + vx, y)  # just across the edge in the travel direction
-        blk = blocks.get(target)
-        if blk is not None:
-            return blk, True
+    # Index of the last in-bounds point along this diagonal
+    last = min(max_x - x if vx > 0 else x, max_y - y if vy > 0 else y)
 
-    # Horizontal edge center
-    if x % 2 == 1 and y % 2 == 0:
-        target = (x, y + vy)
-        blk = blocks.get(target)
-        if blk is not None:
-            return blk, False
+    idx = (y + 1) * width + x + 1
+    step = vy * width + vx
+    # The stop index is the first point past the board, which is still in
+    # the zero border (index >= 0), so negative steps slice correctly too.
+    run = tables[_dir_index(vx, vy)][idx:idx + (last + 1) * step:step]
+    k = len(run) - len(run.lstrip(b"\0"))
+    if k > last:
+        return last, 0, False
+    return k, run[k], not (x + k) & 1
 
-    return None, None
 
+def _staircase(x: int, y: int, vx: int, vy: int, k: int) -> Iterable[Pos]:
+    """
+    Yield the cell centers whose contents decide the points 0..k of a
+    segment starting at (x, y) with direction (vx, vy): at a vertical edge
+    the ray faces (x+vx, y), at a horizontal edge (x, y+vy). Consecutive
+    centers form a staircase beside the diagonal.
 
-def laser_path(board) -> List[Set[Pos]]:
+    Parameters
+        x, y : int
+            Starting half-grid position of the segment.
+        vx, vy : int
+            Direction components (±1).
+        k : int
+            Index of the final point of the segment, as returned by `_march`.
+
+    Returns
+        Iterable[Pos]
+            Cell centers (cx, cy), which may lie just outside the board.
+    """
+    facing = _FACING[((x & 1) << 1) | (y & 1)]
+    if facing is None:
+        return  # never lands on an edge center
+    vert = facing[0]  # vertical edges face sideways
+    cx, cy = x + facing[0] * vx, y + facing[1] * vy
+
+    for _ in range(k + 1):
+        yield cx, cy
+        if vert:
+            cy += 2 * vy
+        else:
+            cx += 2 * vx
+        vert = not vert
+
+
+class HitSet(_SetABC):
+    """
+    Read-only set of the half-grid points visited by one lazor.
+
+    Points are stored as one flag byte per lattice point, using the same
+    padded layout as the edge tables, so the tracer can mark a whole
+    straight segment with a single strided slice assignment instead of
+    building and hashing a tuple per point. Membership tests are one index
+    lookup; tuples are only created when the set is iterated.
+
+    Parameters
+        marks : bytearray
+            Flag per padded lattice point (nonzero = visited).
+        width : int
+            Padded row length, so (x, y) lives at (y+1)*width + (x+1).
+    """
+    __slots__ = ("_marks", "_width")
+
+    def __init__(self, marks: bytearray, width: int):
+        self._marks = marks
+        self._width = width
+
+    def __contains__(self, pos) -> bool:
+        try:
+            x, y = pos
+        except (TypeError, ValueError):
+            return False
+        w = self._width
+        if not (0 <= x <= w - 3 and 0 <= y <= len(self._marks) // w - 3):
+            return False  # outside the half-grid
+        return bool(self._marks[(y + 1) * w + x + 1])
+
+    def __iter__(self) -> Iterator[Pos]:
+        marks, w = self._marks, self._width
+        i = marks.find(1)
+        while i != -1:
+            y, x = divmod(i, w)
+            yield x - 1, y - 1
+            i = marks.find(1, i + 1)
+
+    def __len__(self) -> int:
+        return self._marks.count(1)
+
+    def __repr__(self) -> str:
+        return "HitSet(%r)" % (set(self),)
+
+
+def iter_laser_paths(board, probed: Optional[Set[Pos]] = None,
+                     targets: Optional[Iterable[Pos]] = None,
+                     edge_tables: Optional[Tuple[EdgeTables, int]] = None
+                     ) -> Iterator[AbstractSet[Pos]]:
     """
     Trace each lazor from board.lasers over the half-grid, applying the
-    `.interact()` logic implemented by Block classes from :mod:`blocks`.
+    block rules defined by the Block classes in :mod:`blocks`.
+
+    Rays are traced one straight segment at a time (see `_march`), so the
+    block physics is only resolved at the points where a ray actually
+    meets a block. That physics is looked up in `_TRANSITIONS`, a table
+    precomputed from each class's `.interact()`, so no method is called
+    and no list is allocated per hit.
 
     Assumptions
     
@@ -145,63 +326,162 @@ def laser_path(board) -> List[Set[Pos]]:
 
     Parameters
         Board 
+        probed : set[(int,int)] | None
+            If given, every cell center whose contents the trace depended on
+            is added to it. Changing blocks anywhere else cannot change the
+            result, which lets callers reuse it across similar boards.
+        targets : iterable[(int,int)] | None
+            If given, tracing stops as soon as every target has been hit by
+            some lazor; the last hit set yielded is then partial and later
+            sources are not yielded at all.
+        edge_tables : (tables, width) | None
+            Edge tables from `build_edge_tables` that match the board's
+            current blocks. By default they are built fresh from the board.
     
-    Returns
-        list[set[(int,int)]]:
-            For each lazor source in `board.lasers`, the set of all half-grid
-            coordinates visited by that lazor and any of its refracted branches.
+    Yields
+        HitSet:
+            For each lazor source in `board.lasers`, in order, the set of all
+            half-grid coordinates visited by that lazor and any of its
+            refracted branches. Each set is yielded as soon as that source is
+            fully traced, so callers can stop early.
     """
     rows, cols = _board_dims(board)
     if rows == 0 or cols == 0:
-        return [set() for _ in getattr(board, "lasers", [])]
+        width = 2 * cols + 3
+        for _ in getattr(board, "lasers", []):
+            yield HitSet(bytearray(width * (2 * rows + 3)), width)  # nothing to hit
+        return
 
     max_x, max_y = 2 * cols, 2 * rows  # inclusive bounds of the half-grid perimeter
 
-    # Build a fast block lookup from the current board state
-    blocks = _grid_to_blockmap(board)
+    # Edge lookup tables for the current board state
+    if edge_tables is None:
+        edge_tables = build_edge_tables(board)
+    tables, width = edge_tables
+
+    # Local aliases for names used on every segment (LOAD_FAST, not LOAD_GLOBAL)
+    march, transitions, lattice_w = _march, _TRANSITIONS, max_x + 1
+    n_states = lattice_w * (max_y + 1) * 4
+
+    n_points = len(tables[0])
+    ones = b"\1" * (max(max_x, max_y) + 1)  # slice source for marking segments
+
+    # Padded indexes of targets not hit yet. Targets off the half-grid can
+    # never be hit, so their presence disables the early exit.
+    pending: Optional[List[int]] = None
+    if targets is not None:
+        targets = list(targets)
+        if all(0 <= tx <= max_x and 0 <= ty <= max_y for tx, ty in targets):
+            pending = [(ty + 1) * width + tx + 1 for tx, ty in targets]
+
+    # Hit sets of sources already traced; duplicate sources reuse them
+    # (HitSet is read-only, so sharing one is safe)
+    seen_sources: Dict[Ray, HitSet] = {}
+
+    for source in board.lasers:
+        if source in seen_sources:
+            yield seen_sources[source]
+            continue
+        sx, sy, svx, svy = source
+        marks = bytearray(n_points)
+        if not (0 <= sx <= max_x and 0 <= sy <= max_y):
+            yield HitSet(marks, width)
+            continue
+
+        # Active segments for this source: flat (x, y, vx, vy) states
+        active: List[Ray] = [(sx, sy, svx, svy)]
+        # Segment start states already traced; a ray is deterministic from
+        # its start state, so repeating one can only retrace known ground.
+        # States are packed into one int (lattice index, then 2 direction
+        # bits) that indexes a flag byte in this table.
+        visited_states = bytearray(n_states)
+        pop, push = active.pop, active.append
+
+        while active:
+            x, y, vx, vy = pop()
+
+            state = ((y * lattice_w + x) << 2) | (vx + 1) | ((vy + 1) >> 1)
+            if visited_states[state]:
+                continue  # loop detected for this ray
+            visited_states[state] = 1
+
+            k, code, is_vert = march(tables, width, x, y, vx, vy, max_x, max_y)
+            # Mark points 0..k in one strided write; as in _march, the stop
+            # index stays inside the zero border.
+            idx = (y + 1) * width + x + 1
+            step = vy * width + vx
+            marks[idx:idx + (k + 1) * step:step] = ones[:k + 1]
+
+            if pending is not None:
+                pending = [i for i in pending if not marks[i]]
+                if not pending:
+                    yield HitSet(marks, width)  # every target is hit
+                    return
+            if probed is not None:
+                probed.update(_staircase(x, y, vx, vy, k))
+
+            if not code:
+                continue  # ray left the board
+
+            # Spawn children rays at the impact point (none means
+            # absorption). To avoid immediately re-processing the same edge,
+            # step each spawned ray forward by one unit.
+            px, py = x + k * vx, y + k * vy
+            key = (code << 3) | (is_vert << 2) | (vx + 1) | ((vy + 1) >> 1)
+            for rx, ry in transitions[key]:
+                nx, ny = px + rx, py + ry
+                if 0 <= nx <= max_x and 0 <= ny <= max_y:
+                    push((nx, ny, rx, ry))
+
+        seen_sources[source] = hits = HitSet(marks, width)
+        yield hits
+
+
+def laser_path(board, probed: Optional[Set[Pos]] = None) -> List[AbstractSet[Pos]]:
+    """
+    Trace every lazor on the board; see `iter_laser_paths`.
+
+    Parameters
+        Board
+        probed : set[(int,int)] | None
+            Optional set collecting the cell centers the trace depended on.
 
-    results: List[Set[Pos]] = []
+    Returns
+        list[HitSet]:
+            For each lazor source in `board.lasers`, the set of all half-grid
+            coordinates visited by that lazor and any of its refracted branches.
+    """
+    return list(iter_laser_paths(board, probed))
 
-    for (sx, sy, svx, svy) in board.lasers:
-        # Active rays for this source: list of (pos, dir)
-        active: List[Tuple[Pos, Dir]] = [((sx, sy), (svx, svy))]
-        visited_states: Set[Tuple[int, int, int, int]] = set()
-        hits: Set[Pos] = set()
 
-        while active:
-            (x, y), (vx, vy) = active.pop()
-
-            # Advance until this ray dies (out of bounds or absorbed) or branches.
-            while 0 <= x <= max_x and 0 <= y <= max_y:
-                hits.add((x, y))
-
-                state = (x, y, vx, vy)
-                if state in visited_states:
-                    break  # loop detected for this ray
-                visited_states.add(state)
-
-                # If we're centered on a block-edge, check for interaction.
-                blk, is_vert = _edge_hit(blocks, x, y, vx, vy)
-                if blk is not None:
-                    # Let the block drive the physics.
-                    interactions = blk.interact((x, y), (vx, vy), bool(is_vert))
-
-                    # No interactions means absorption (opaque)
-                    if not interactions:
-                        break
-
-                    # Spawn children rays. To avoid immediately re-processing
-                    # the same edge, step each spawned ray forward by one unit.
-                    for (px, py), (rx, ry) in interactions:
-                        nx, ny = px + rx, py + ry
-                        if 0 <= nx <= max_x and 0 <= ny <= max_y:
-                            active.append(((nx, ny), (rx, ry)))
-                    break  # stop advancing this current ray; spawned children continue instead.
-
-                # No interaction at this node -> advance diagonally by one
-                x += vx
-                y += vy
-
-        results.append(hits)
-
-    return results
+def targets_covered(board, targets: Iterable[Pos],
+                    probed: Optional[Set[Pos]] = None,
+                    edge_tables: Optional[Tuple[EdgeTables, int]] = None) -> bool:
+    """
+    Check whether the lazors on the board hit every target, stopping the
+    trace as soon as all targets are hit (see `iter_laser_paths`).
+
+    Parameters
+        Board
+        targets : iterable[(int,int)]
+            Half-grid coordinates the lazors must pass through.
+        probed : set[(int,int)] | None
+            Optional set collecting the cell centers the trace depended on.
+            It is only complete when the result is False.
+        edge_tables : (tables, width) | None
+            Optional prebuilt edge tables, see `iter_laser_paths`.
+
+    Returns
+        bool
+            True if every target lies on some lazor path.
+    """
+    remaining = list(targets)
+    if not remaining:
+        return True
+
+    for hits in iter_laser_paths(board, probed, remaining, edge_tables):
+        remaining = [t for t in remaining if t not in hits]
+        if not remaining:
+            return True  # no need to trace the remaining sources
+
+    return False
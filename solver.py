@@ -2,12 +2,12 @@
 
 '''
 Define the core logic that attempts to find a valid configuration of movable blocks to solve a given Lazor board.
-Use the bff.py(Board + parse_bff) & laser.py(laser_path simulation) modules.
+Use the bff.py(Board + parse_bff) & laser.py(targets_covered simulation) modules.
 '''
 
 from itertools import combinations, combinations_with_replacement
-from copy import deepcopy
-from laser import laser_path
+from operator import itemgetter
+from laser import targets_covered, build_edge_tables, update_edge_tables
 
 
 def check_solution(hit_paths, target_points):
@@ -25,14 +25,13 @@ def check_solution(hit_paths, target_points):
         bool
             True if all target points are hit.
     """
-    all_hits = set().union(*hit_paths)
-
-    # Check each target one by one
+    # Check each target one by one against every laser's hits (no merged
+    # set is built)
     for point in target_points:
 
         # If a target is missed, stop checking early, as the solution already
         # cannot be valid
-        if point not in all_hits:
+        if not any(point in hits for hits in hit_paths):
 
             return False
 
@@ -42,6 +41,7 @@ def check_solution(hit_paths, target_points):
 def generate_block_combinations(board):
     """
     Generate a possible configurations of movable blocks, one at a time. Returns one configuration at a time. Will eventually generate all possible configurations if needed.
+    Slots nearest the targets are filled first.
 
     Parameters
         board : Board
@@ -53,56 +53,60 @@ def generate_block_combinations(board):
     """
     open_slots = board.placeable_slots()
     movable_counts = board.movable_counts
+    targets = board.targets
+
+    # Try slots closest to a target first: blocks there are the most likely
+    # to decide whether the target is hit, so failed traces depend on fewer
+    # slots and rule out more placements early (cell centers are at
+    # (2*c+1, 2*r+1))
+    if targets:
+        open_slots = sorted(open_slots, key=lambda slot: min(
+            abs(2 * slot[1] + 1 - x) + abs(2 * slot[0] + 1 - y)
+            for x, y in targets))
+
+    n_a = movable_counts.get('A', 0)
+    n_b = movable_counts.get('B', 0)
+    n_c = movable_counts.get('C', 0)
 
     # Generate list of indices indicating each open slot
     n_slots = len(open_slots)
     slots_idx = range(n_slots)
 
+    # Template placement with every slot blank; each yielded placement is a
+    # copy of it with only the chosen slots filled in
+    blank = dict.fromkeys(open_slots)
+
     # Use a combination method to generate all possible COMBOS of slot
     # placements (since order doesn't matter between blocks of same type)
 
     # Generate all possible placements of all the A blocks 
     # Need to do with with all blocks, A, B, C.
-    for a_slots in combinations(slots_idx, movable_counts.get('A', 0)):
+    for a_slots in combinations(slots_idx, n_a):
 
         # For all of those possibilities, use the remaining open slots
-        remaining_after_a = [i for i in slots_idx if i not in a_slots]
+        taken = set(a_slots)
+        remaining_after_a = [i for i in slots_idx if i not in taken]
 
         # For the remaining open slots, generate all possible placement of B
-        for b_slots in combinations(
-            remaining_after_a,
-            movable_counts.get(
-                'B',
-                0)):
+        for b_slots in combinations(remaining_after_a, n_b):
 
             # Repeat for blocks of type C
+            taken = set(b_slots)
             remaining_after_b = [
-                i for i in remaining_after_a if i not in b_slots]
-            for c_slots in combinations(
-                remaining_after_b,
-                movable_counts.get(
-                    'C',
-                    0)):
+                i for i in remaining_after_a if i not in taken]
+            for c_slots in combinations(remaining_after_b, n_c):
 
                 # Generate the placement dictionary mapping blocks to the found
-                # slots
-                placement = {}
-                for i, slot in enumerate(open_slots):
+                # slots, leaving all other slots blank (None)
+                placement = blank.copy()
+                for i in a_slots:
+                    placement[open_slots[i]] = 'A'
 
-                    # If the index has been set aside for an A block, fill it
-                    # in as such
-                    if i in a_slots:
-                        placement[slot] = 'A'
-
-                    # Repeat for B and C blocks
-                    elif i in b_slots:
-                        placement[slot] = 'B'
-                    elif i in c_slots:
-                        placement[slot] = 'C'
-
-                    # Otherwise, indicate that the slot is blank
-                    else:
-                        placement[slot] = None
+                # Repeat for B and C blocks
+                for i in b_slots:
+                    placement[open_slots[i]] = 'B'
+                for i in c_slots:
+                    placement[open_slots[i]] = 'C'
 
                 # Return the generated possibilites one at a time
                 yield placement
@@ -120,10 +124,11 @@ def apply_blocks_to_board(base_board, placement):
 
     Returns
         Board
-            Deep copy of the board with all blocks (fixed + movable) applied.
+            Copy of the board (see Board.copy_for_trial) with all blocks
+            (fixed + movable) applied.
     """
-    board_copy = deepcopy(base_board)
-    grid = deepcopy(board_copy.grid)
+    board_copy = base_board.copy_for_trial()
+    grid = board_copy.grid
 
     # Apply movable blocks
     for (r, c), btype in placement.items():
@@ -139,7 +144,6 @@ def apply_blocks_to_board(base_board, placement):
                 blocks[((2 * c) + 1, (2 * r) + 1)] = val
 
     board_copy.blocks = blocks
-    board_copy.grid = grid
     return board_copy
 
 
@@ -147,6 +151,11 @@ def solve(board):
     """
     Try all possible block configurations until one solves the board.
 
+    Placements are patched into one working copy of the board (see
+    Board.copy_for_trial), touching only cells that differ from the previous
+    placement, so the board passed in is never changed. The laser edge
+    tables are built once and updated alongside each patched cell.
+
     Parameters
         board : Board
             Parsed Lazor board object.
@@ -158,18 +167,74 @@ def solve(board):
     """
     test_combo = generate_block_combinations(board)
 
+    # Working copy to patch placements into; it traces from its own grid,
+    # since any explicit block map on the board is not copied
+    work = board.copy_for_trial()
+
+    # Slots the last failed trace (or the failure last matched in `failed`)
+    # depended on, mapped to what they held. A placement that agrees on all
+    # of them traces identical paths, so it fails too and can be skipped
+    # without simulating it.
+    last_seen = None
+
+    # Every failed trace so far, grouped by the slots it depended on:
+    # {slots: (getter for those slots, set of their failed contents)}.
+    # Checked after last_seen, it catches repeats of older failures.
+    failed = {}
+
+    # Laser lookup tables for the working copy, kept in step with its grid
+    grid = work.grid
+    edge_tables = build_edge_tables(work)
+
     for i, placement in enumerate(
             test_combo, start=1):  # 1-indexed for user-friendly output
-        test_board = apply_blocks_to_board(
-            board, placement)  # Apply current placement
-        hit_paths = laser_path(test_board)  # Simulate lasers
-
-        if check_solution(
-                hit_paths,
-                board.targets):  # Check if all targets are hit
+        if last_seen is not None and all(
+                placement.get(slot) == btype
+                for slot, btype in last_seen.items()):
+            continue  # Same outcome as the last failed trace
+        match = None
+        for slots, (get, seen) in failed.items():
+            held = get(placement)
+            if held in seen:
+                match = slots
+                break
+        if match is not None:
+            # Same outcome as an earlier failed trace; check against
+            # that one first from now on
+            last_seen = {slot: placement[slot] for slot in match}
+            continue
+
+        # Apply current placement, changing only cells that differ
+        for (r, c), btype in placement.items():
+            val = btype or 'o'
+            if grid[r][c] != val:
+                grid[r][c] = val
+                update_edge_tables(edge_tables, r, c, val)
+        probed = set()
+
+        # Simulate lasers, stopping as soon as all targets are hit
+        if targets_covered(work, board.targets, probed, edge_tables):
             print(f"Solution found after {i} tries!")  # Notify user
             return placement  # Return valid placement
 
+        # Remember which open slots this trace looked at (cell centers
+        # (2*c+1, 2*r+1) map back to slots (r, c))
+        last_seen = {}
+        for cx, cy in probed:
+            slot = ((cy - 1) // 2, (cx - 1) // 2)
+            if slot in placement:
+                last_seen[slot] = placement[slot]
+
+        # No open slot affected the trace, so every placement fails
+        if not last_seen:
+            break
+
+        slots = tuple(sorted(last_seen))
+        if slots not in failed:
+            failed[slots] = (itemgetter(*slots), set())
+        get, seen = failed[slots]
+        seen.add(get(placement))
+
     print("No valid solution found.")  # Notify user
     return None
 
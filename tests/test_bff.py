@@ -2,6 +2,7 @@
 
 import pytest
 from bff import parse_bff, Board
+from laser import laser_path
 
 # Helper function for generating a sample bff file to test parsing
 
@@ -109,6 +110,35 @@ def test_invalid_target(tmp_path):
     with pytest.raises(ValueError, match="Target line needs 2 integers"):
         parse_bff(path)
 
+# Test that lines outside the grid that are not counts, lasers or targets raise an error
+
+
+@pytest.mark.parametrize("line, error", [
+    ("Lx 1 2 3 4", "Unrecognized line"),
+    ("A2", "Unrecognized line"),
+    ("A", "Block count line needs 1 integer"),
+])
+def test_malformed_line(tmp_path, line, error):
+    '''
+    Testing to make sure a malformed line outside the grid raises an error instead of being skipped.
+    '''
+    # Generate test content for the bff file with one malformed line
+    content = """
+    GRID START
+    o o o
+    GRID STOP
+    %s
+    L 1 0 1 1
+    P 2 3
+    """ % line
+
+    # Make a test bff file with that content
+    path = write_bff(tmp_path, content)
+
+    # Attempt to parse the test bff file and ensure that an error is raised
+    with pytest.raises(ValueError, match=error):
+        parse_bff(path)
+
 # Test overall parsing of the bff file
 
 
@@ -197,3 +227,49 @@ def test_ignore_comments_and_blank_lines(tmp_path):
     assert board.size() == (2, 3)
     assert board.placeable_slots() == [(0, 0), (0, 2), (1, 0), (1, 1), (1, 2)]
 
+# Test that laser paths always follow the board's current grid
+
+
+def test_grid_changes_seen_by_laser_path():
+    '''
+    Test that writing to Board.grid directly between traces changes the laser paths, matching a freshly built board.
+    '''
+    # Generate a sample Board class object and trace it once
+    board = Board([['o', 'o'], ['o', 'o']], {'A': 1, 'B': 0, 'C': 0},
+                  [(1, 0, 1, 1)], [(4, 1)])
+    empty_paths = laser_path(board)
+    assert (4, 3) in empty_paths[0]
+
+    # Put an opaque block in the lazor's way and check against a board
+    # built with it
+    board.grid[1][1] = 'B'
+    fresh = Board([['o', 'o'], ['o', 'B']], {}, [(1, 0, 1, 1)], [])
+    assert laser_path(board) == laser_path(fresh)
+    assert (4, 3) not in laser_path(board)[0]
+
+    # Clearing the cell restores the original paths
+    board.grid[1][1] = 'o'
+    assert laser_path(board) == empty_paths
+
+
+# Test that a trial copy of a board has its own grid
+
+
+def test_copy_for_trial():
+    '''
+    Test that Board.copy_for_trial() copies the grid but shares the other fields.
+    '''
+    # Generate a sample Board class object with an explicit block map
+    board = Board([['o', 'x'], ['B', 'o']], {'A': 1, 'B': 0, 'C': 0},
+                  [(1, 0, 1, 1)], [(4, 1)])
+    board.blocks = {(1, 3): 'B'}
+    trial = board.copy_for_trial()
+
+    # Changing the copy leaves the original grid unchanged
+    trial.grid[0][0] = 'A'
+    assert board.grid == [['o', 'x'], ['B', 'o']]
+    assert trial.grid == [['A', 'x'], ['B', 'o']]
+
+    # Lasers and targets are shared, the block map is not
+    assert trial.lasers is board.lasers and trial.targets is board.targets
+    assert not hasattr(trial, 'blocks')
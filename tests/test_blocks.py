@@ -1,7 +1,7 @@
 # Unit Testing blocks.py #
 
 import pytest
-from blocks import ReflectBlock, OpaqueBlock, RefractBlock, BLOCKS
+from blocks import ReflectBlock, OpaqueBlock, RefractBlock, BLOCKS, BLOCKS_BY_CODE
 
 # Testing to make sure that our type A blocks correctly reflect lasers
 # when hit on vertical edge
@@ -171,3 +171,16 @@ def test_blocks_dict_contains_correct_types():
     assert isinstance(BLOCKS['A'], ReflectBlock)
     assert isinstance(BLOCKS['B'], OpaqueBlock)
     assert isinstance(BLOCKS['C'], RefractBlock)
+
+# Test that the BLOCKS_BY_CODE table lines up with each block's code
+
+
+def test_blocks_by_code_matches_codes():
+    '''
+    Ensure BLOCKS_BY_CODE maps each block's integer code back to the same instance, with 0 meaning no block.
+    '''
+    assert BLOCKS_BY_CODE[0] is None
+
+    # Check that every block type can be looked up by its code
+    for kind, block in BLOCKS.items():
+        assert BLOCKS_BY_CODE[block.code] is block
@@ -1,7 +1,7 @@
 # Unit Test for laser.py #
 
 import pytest
-from laser import laser_path
+from laser import laser_path, iter_laser_paths, targets_covered, build_edge_tables, update_edge_tables, HitSet
 from blocks import BLOCKS
 from types import SimpleNamespace
 
@@ -119,3 +119,155 @@ def test_btype_C():
     # Laser should have 2 distinct trajectories
     assert (4, 3) in hits and (4, 1) in hits
 
+
+# Test that laser_path reports the cells its result depended on
+def test_probed_cells():
+    '''
+    Test that the probed set includes the block the laser struck and leaves out cells the laser never came near.
+    '''
+    # Make a sample grid for testing
+    grid = [
+        ["x", "x", "x"],
+        ["x", "B", "x"],
+        ["x", "x", "x"]
+    ]
+
+    # Make a sample laser moving towards the B block for testing
+    lasers = [(1, 0, 1, 1)]
+
+    # Trace the laser and collect the cell centers it depended on
+    probed = set()
+    laser_path(make_board(grid, lasers), probed)
+
+    # The absorbing block was inspected, the far corner cell was not
+    assert (3, 3) in probed
+    assert (5, 1) not in probed
+
+
+# Test that targets_covered agrees with the traced laser paths
+def test_targets_covered():
+    '''
+    Test that targets_covered reports True only when every target lies on a laser path.
+    '''
+    # Make a sample grid for testing
+    grid = [
+        ["x", "x", "x"],
+        ["x", "A", "x"],
+        ["x", "x", "x"]
+    ]
+
+    # Make a sample laser moving towards the A block for testing
+    lasers = [(1, 0, 1, 1)]
+    test_board = make_board(grid, lasers)
+
+    # Both points are on the reflected path
+    assert targets_covered(test_board, [(3, 2), (4, 1)])
+
+    # The point behind the A block is never reached
+    assert not targets_covered(test_board, [(3, 2), (4, 3)])
+
+
+# Test that the HitSet returned for each laser behaves like a normal set
+def test_hit_set_behaves_like_set():
+    '''
+    Test that HitSet supports membership, length, iteration and comparison with a regular set.
+    '''
+    # Make a sample grid with no blocks and a laser crossing it
+    grid = [
+        ["o", "o"],
+        ["o", "o"]
+    ]
+    lasers = [(1, 0, 1, 1)]
+
+    # Trace the laser across the empty board
+    hits = laser_path(make_board(grid, lasers))[0]
+    expected = {(1, 0), (2, 1), (3, 2), (4, 3)}
+
+    # Check that the result matches the straight diagonal path
+    assert isinstance(hits, HitSet)
+    assert hits == expected
+    assert len(hits) == 4
+    assert set(hits) == expected
+
+    # Points off the path or off the board are not members
+    assert (0, 0) not in hits
+    assert (5, 4) not in hits
+    assert (-1, 0) not in hits
+
+    # A board without cells still gives each laser an empty HitSet
+    hit_paths = laser_path(make_board([], lasers))
+    assert len(hit_paths) == 1
+    assert isinstance(hit_paths[0], HitSet)
+    assert len(hit_paths[0]) == 0 and (1, 0) not in hit_paths[0]
+
+
+# Test that prebuilt edge tables kept current by update_edge_tables trace like fresh ones
+def test_update_edge_tables():
+    '''
+    Test that edge tables updated after each grid change give the same paths as tables rebuilt from the grid.
+    '''
+    # Make a sample empty grid and build its edge tables once
+    grid = [
+        ["o", "o"],
+        ["o", "o"]
+    ]
+    test_board = make_board(grid, [(1, 0, 1, 1)])
+    edge_tables = build_edge_tables(test_board)
+
+    # Place an opaque block and update only that cell in the tables
+    grid[1][1] = "B"
+    update_edge_tables(edge_tables, 1, 1, "B")
+    assert targets_covered(test_board, [(3, 2)], edge_tables=edge_tables)
+    assert not targets_covered(test_board, [(4, 3)], edge_tables=edge_tables)
+    assert not targets_covered(test_board, [(4, 3)])
+
+    # Clearing the cell again lets the lazor through
+    grid[1][1] = "o"
+    update_edge_tables(edge_tables, 1, 1, "o")
+    assert targets_covered(test_board, [(4, 3)], edge_tables=edge_tables)
+
+
+# Test that duplicate laser sources are traced once and give the same result
+def test_duplicate_lasers():
+    '''
+    Test that repeated laser sources each get a result, identical to the first.
+    '''
+    # Make a sample grid for testing
+    grid = [
+        ["x", "x", "x"],
+        ["x", "C", "x"],
+        ["x", "x", "x"]
+    ]
+
+    # The same laser listed twice, plus a different one
+    lasers = [(1, 0, 1, 1), (5, 0, -1, 1), (1, 0, 1, 1)]
+    hit_paths = laser_path(make_board(grid, lasers))
+
+    # One result per source, with the duplicate matching the original
+    assert len(hit_paths) == 3
+    assert hit_paths[2] == hit_paths[0]
+    assert hit_paths[1] != hit_paths[0]
+
+
+# Test that tracing stops once every target has been hit
+def test_early_exit_on_targets():
+    '''
+    Test that iter_laser_paths stops after the targets are all hit.
+    '''
+    # Make a sample grid for testing
+    grid = [
+        ["o", "o"],
+        ["o", "o"]
+    ]
+    lasers = [(1, 0, 1, 1), (3, 0, -1, 1)]
+    board = make_board(grid, lasers)
+
+    # The first lazor hits (2, 1), so the second one is never traced
+    hit_paths = list(iter_laser_paths(board, targets=[(2, 1)]))
+    assert len(hit_paths) == 1
+    assert (2, 1) in hit_paths[0]
+
+    # Without targets both lazors are traced in full
+    hit_paths = list(iter_laser_paths(board))
+    assert len(hit_paths) == 2
+    assert (2, 1) in hit_paths[0]
@@ -1,6 +1,10 @@
 # Unit Testing for solver.py #
 
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
 import pytest
+from bff import Board
 from solver import (
     check_solution,
     generate_block_combinations,
@@ -11,150 +15,170 @@ from solver import (
 # Create a fake Board class for testing our solver in isolation
 
 
+@dataclass(slots=True)
 class SampleBoard:
     """Minimal fake Board class for testing solver logic in isolation from the rest of our code."""
 
-    # Define attributes for test Board class
-    def __init__(self):
+    # Define a sample grid for testing
+    grid: list = field(default_factory=lambda: [
+        ['o', 'x', 'o'],
+        ['B', 'o', 'o'],
+        ['o', 'o', 'o']
+    ])
 
-        # Define a sample grid for testing
-        self.grid = [
-            ['o', 'x', 'o'],
-            ['B', 'o', 'o'],
-            ['o', 'o', 'o']
-        ]
+    # Define a sample pool of movable blocks for testing
+    movable_counts: dict = field(
+        default_factory=lambda: {'A': 2, 'B': 0, 'C': 1})
 
-        # Define a sample pool of movable blocks for testing
-        self.movable_counts = {'A': 2, 'B': 0, 'C': 1}
+    # Define sample lasers for testing
+    lasers: list = field(
+        default_factory=lambda: [(1, 0, 1, 1), (4, 5, -1, -1)])
 
-        # Define sample lasers for testing
-        self.lasers = [(1, 0, 1, 1), (4, 5, -1, -1)]
+    # Define sample targets for testing
+    targets: list = field(default_factory=lambda: [(1, 6), (6, 3)])
 
-        # Define sample targets for testing
-        self.targets = [(1, 6), (6, 3)]
+    # Explicit block map, set by apply_blocks_to_board (as on bff.Board)
+    blocks: Optional[dict] = None
+
+    # Define the open slots once; placeable_slots() returns them as a list
+    _placeable: tuple = field(init=False, default=(
+        (0, 0), (0, 2), (1, 1), (1, 2), (2, 0), (2, 1), (2, 2)))
 
     # Define a method for determining the number of open slots that blocks can
     # be placed at (in (r, c) notation)
     def placeable_slots(self):
         """Simulate open 'o' cells correctly."""
-        return [(0, 0), (0, 2), (1, 1), (1, 2), (2, 0), (2, 1), (2, 2)]
+        return list(self._placeable)  # a list, as bff.Board returns
 
     # Define method for returning the size of the grid
     def size(self):
         return (len(self.grid), len(self.grid[0]))
 
+    # Define method for copying the board with its own grid
+    def copy_for_trial(self):
+        return SampleBoard([row[:] for row in self.grid], self.movable_counts,
+                           self.lasers, self.targets)
 
-# Test that our helper function for checking solutions works correctly
-def test_check_solution_all_targets_hit():
-    '''
-    Testing to ensure that our solution checker works.
-     Ensure that if targets are in the hit_path, checker should return True.
-    '''
-    # Define a sample hit_path for testing
-    hit_paths = [{(1, 1), (2, 2), (3, 3)}]
-
-    # Define a sample target
-    targets = [(3, 3)]
 
-    # Check that the checker correctly identifies that a solution was found
-    assert check_solution(hit_paths, targets) is True
+# Give each test a fresh sample board, since several tests change it
+@pytest.fixture
+def board():
+    return SampleBoard()
 
-# Test that our helper function for checking solutions works correctly in
-# negative case
 
+# Replace solver module attributes by name for one test, e.g.
+# patch_solver(targets_covered=...); monkeypatch undoes them afterwards
+@pytest.fixture
+def patch_solver(monkeypatch):
+    def _apply(**patches):
+        for name, value in patches.items():
+            monkeypatch.setattr(f"solver.{name}", value)
+    return _apply
 
-def test_check_solution_target_missed():
-    '''
-    Testing to ensure that our solution checker works when a solution is NOT found.
-    Ensure that if a target is missed, it returns false early to terminate checking.
-    '''
 
-    # Define a sample hit_path for testing
-    hit_paths = [{(1, 1), (2, 2)}]
+# Stand-ins for the laser simulation (solver.targets_covered) that report
+# every target as hit, or as missed
+def _stub_all_hit(board, targets, probed=None, edge_tables=None):
+    return True
 
-    # Define a sample target for testing
-    targets = [(3, 3), (5, 5)]
 
-    # Check that checker correctly identifies that a target was missed
-    assert check_solution(hit_paths, targets) is False
+def _stub_missed(board, targets, probed=None, edge_tables=None):
+    return False
 
 
-# Test that our helper function for checking solutions works correctly
-# when hit_paths is emtpy
-def test_check_solution_empty_hits():
+# Test that our helper function for checking solutions works correctly when
+# all targets are hit, when a target is missed, and when hit_paths is empty
+@pytest.mark.parametrize("hit_paths, targets, expected", [
+    pytest.param([{(1, 1), (2, 2), (3, 3)}], [(3, 3)], True,
+                 id="all_targets_hit"),
+    pytest.param([{(1, 1), (2, 2)}], [(3, 3), (5, 5)], False,
+                 id="target_missed"),
+    pytest.param([], [(1, 1)], False, id="empty_hits"),
+])
+def test_check_solution(hit_paths, targets, expected):
     '''
-    Test to ensure that an empty hit_path returns that the configuration is not a solution.
+    Testing to ensure that our solution checker returns True only if every target is in the hit_paths.
+    A missed target returns False early to terminate checking.
     '''
-    assert not check_solution([], [(1, 1)])
+    assert check_solution(hit_paths, targets) is expected
 
 
 # Test that generation of possible solutions are consistent with number of
 # movable objects fed in
-def test_generate_block_combinations_counts_and_types():
+def test_generate_block_combinations_counts_and_types(board):
     '''
     Testing to ensure that all generated placements possibilities match expected movable_counts.
     '''
 
-    # Generate a test Board classo object for testing
-    board = SampleBoard()
-
-    # Use block combo generator function on that test object
-    combos = list(generate_block_combinations(board))
-
-    # Verify that there are multiple possible placements
-    assert len(combos) > 0
-
-    # For all the combinations generated,
-    for placement in combos:
+    # For all the combinations generated by the block combo generator function
+    # (one at a time, without collecting them into a list),
+    expected_keys = frozenset(board.placeable_slots())
+    saw_any = False
+    for placement in generate_block_combinations(board):
+        saw_any = True
 
         # Ensure each placement has correct keys and valid block types
-        assert set(placement.keys()) == set(board.placeable_slots())
+        assert placement.keys() == expected_keys
 
         # Ensure that the correct block types are maintained
-        for btype in placement.values():
-            assert btype in (None, 'A', 'B', 'C')
+        counts = Counter(placement.values())
+        assert set(counts) <= {None, 'A', 'B', 'C'}
 
-        # Ensure correct total number of A and B blocks are being generated
-        count_A = sum(1 for v in placement.values() if v == 'A')
-        count_C = sum(1 for v in placement.values() if v == 'C')
-        assert count_A <= board.movable_counts['A']
-        assert count_C <= board.movable_counts['C']
+        # Ensure correct total number of A and C blocks are being generated
+        assert counts['A'] <= board.movable_counts['A']
+        assert counts['C'] <= board.movable_counts['C']
+
+    # Verify that there is at least one possible placement
+    assert saw_any
 
 
 # Test that the generation of possible solutions reacts correctly to there
 # being no movable blocks
-def test_generate_block_combinations_zero_blocks():
+def test_generate_block_combinations_zero_blocks(board):
     '''
     Testing to ensure that if no movable blocks are fed into the combo generation function, all placements should be None.
     '''
-    # Generate a test Board class object
-    board = SampleBoard()
 
     # Set the movable counts of that test Board class object to none
     board.movable_counts = {'A': 0, 'B': 0, 'C': 0}
 
     # Use that test Board class object to generate possible placements
-    combos = list(generate_block_combinations(board))
+    combos = generate_block_combinations(board)
+    first = next(combos)
 
     # Check that the results are as expected
 
     # Check that only one possibility is generated (order doesn't matter)
-    assert len(combos) == 1
+    assert next(combos, None) is None
 
     # Check that the possibility is filled with None
-    assert all(v is None for v in combos[0].values())
+    assert all(v is None for v in first.values())
+
+
+# Test that slots nearest a target are filled first
+def test_generate_block_combinations_target_order(board):
+    '''
+    Testing to ensure that the first placement fills the open slot nearest a target, and that a board with no targets keeps the placeable_slots() order.
+    '''
+    # Slot (1, 2) has its cell center (5, 3) one step from target (6, 3),
+    # closer than any other open slot
+    first = next(generate_block_combinations(board))
+    assert first[(1, 2)] is not None
+    assert next(iter(first)) == (1, 2)
+
+    # Without targets, slots keep the order placeable_slots() gives them
+    board.targets = []
+    first = next(generate_block_combinations(board))
+    assert list(first) == list(board.placeable_slots())
 
 
 # Test that our "apply_blocks_to_board" function works correctly in
 # mapping the placement to a grid
-def test_apply_blocks_to_board_adds_blocks_correctly():
+def test_apply_blocks_to_board_adds_blocks_correctly(board):
     '''
     Testing to ensure block placements are correctly applied to a grid and block dictionary.
     '''
 
-    # Generate a test Board class object
-    board = SampleBoard()
-
     # Generate a sample placement
     placement = {(0, 0): 'A', (0, 2): None, (1, 1): 'B', (1, 2): None}
 
@@ -176,14 +200,11 @@ def test_apply_blocks_to_board_adds_blocks_correctly():
 # object
 
 
-def test_apply_blocks_to_board_does_not_modify_original():
+def test_apply_blocks_to_board_does_not_modify_original(board):
     '''
     Ensure original board is not mutated by apply_blocks_to_board().
     '''
 
-    # Generate a test Board class object
-    board = SampleBoard()
-
     # Generate a sample placement for testing
     placement = {(0, 0): 'A'}
 
@@ -197,27 +218,17 @@ def test_apply_blocks_to_board_does_not_modify_original():
 
 
 # Test that the solver can find a solution correctly
-def test_solve_finds_solution(monkeypatch):
+def test_solve_finds_solution(board, patch_solver):
     '''
     Check that our solver function can correctly find a solution that exists.
     '''
-    # Generates a test Board class object
-    board = SampleBoard()
 
-    # Force generate_block_combinations to yield one placement
+    # Force generate_block_combinations to yield one placement, and the
+    # laser simulation to report that all targets are hit
     fake_placement = {(0, 0): 'A'}
-    monkeypatch.setattr(
-        'solver.generate_block_combinations',
-        lambda b: [fake_placement])
-
-    # Force apply_blocks_to_board (just returns same board)
-    monkeypatch.setattr('solver.apply_blocks_to_board', lambda b, p: b)
-
-    # Force laser_path to return hits that include all targets
-    monkeypatch.setattr('solver.laser_path', lambda b: [{(3, 3)}])
-
-    # Force check_solution to always return True
-    monkeypatch.setattr('solver.check_solution', lambda hits, targets: True)
+    patch_solver(
+        generate_block_combinations=lambda b: [fake_placement],
+        targets_covered=_stub_all_hit)
 
     # Solve the test board using our solver function
     placement = solve(board)
@@ -228,19 +239,15 @@ def test_solve_finds_solution(monkeypatch):
 
 
 # Test that our solver function doesn't find a solution when one doesn't exist
-def test_solve_no_solution(monkeypatch):
+def test_solve_no_solution(board, patch_solver):
     '''
     Test to ensure that the solver returns None when no solution to a board is possible.
     '''
-    # Generate a test Board
-    board = SampleBoard()
 
     # Force the attributes to yield an unsolvable board
-    monkeypatch.setattr('solver.generate_block_combinations',
-                        lambda b: [{(0, 0): 'A'}])
-    monkeypatch.setattr('solver.apply_blocks_to_board', lambda b, p: b)
-    monkeypatch.setattr('solver.laser_path', lambda b: [{(0, 0)}])
-    monkeypatch.setattr('solver.check_solution', lambda h, t: False)
+    patch_solver(
+        generate_block_combinations=lambda b: [{(0, 0): 'A'}],
+        targets_covered=_stub_missed)
 
     # Use our solver function to attempt to solve the board
     result = solve(board)
@@ -249,4 +256,80 @@ def test_solve_no_solution(monkeypatch):
     assert result is None
 
 
+# Test that the solver leaves the board it was given unchanged
+def test_solve_leaves_input_board_unchanged(board, patch_solver):
+    '''
+    Test to ensure that solve() applies each placement to a working copy, leaving the board it was given unchanged.
+    '''
+    original = [row[:] for row in board.grid]
+
+    # Record the grid each placement is traced on, and report no solution
+    seen = []
+
+    def fake_targets_covered(b, targets, probed=None, edge_tables=None):
+        seen.append([row[:] for row in b.grid])
+        probed.add((1, 1))  # the trace looked at slot (0, 0)
+        return False
+
+    patch_solver(
+        generate_block_combinations=lambda b: [{(0, 0): 'A', (0, 2): None},
+                                               {(0, 0): None, (0, 2): 'C'}],
+        targets_covered=fake_targets_covered)
+
+    # Use our solver function to attempt to solve the board
+    assert solve(board) is None
+
+    # Check that each placement was applied, and the given board was not
+    assert seen[0][0][0] == 'A' and seen[0][0][2] == 'o'
+    assert seen[1][0][0] == 'o' and seen[1][0][2] == 'C'
+    assert board.grid == original
+
+
+# Test that the solver does not re-trace a placement an earlier failure covers
+def test_solve_skips_repeated_failures(board, patch_solver):
+    '''
+    Test to ensure that a placement matching an earlier (not just the last) failed trace is skipped.
+    '''
+
+    # Every trace only looks at slot (0, 0) and fails
+    calls = []
+
+    def fake_targets_covered(b, targets, probed=None, edge_tables=None):
+        calls.append(b.grid[0][0])
+        probed.add((1, 1))  # cell center of slot (0, 0)
+        return False
+
+    # The third placement holds the same block in slot (0, 0) as the first
+    patch_solver(
+        generate_block_combinations=lambda b: [{(0, 0): 'A', (0, 2): None},
+                                               {(0, 0): 'C', (0, 2): None},
+                                               {(0, 0): 'A', (0, 2): 'C'}],
+        targets_covered=fake_targets_covered)
+
+    # Use our solver function to attempt to solve the board
+    assert solve(board) is None
+
+    # Check that only the first two placements were traced
+    assert calls == ['A', 'C']
+
 
+# Test that the solver traces placements even if the board has a block map
+def test_solve_board_with_blocks_map():
+    '''
+    Test to ensure that a board with .blocks already set (e.g. from apply_blocks_to_board) can still be solved.
+    '''
+    # A lazor from (1, 0) moving down-right only reaches target (0, 3) if a
+    # reflect block sits in cell (0, 1)
+    board = Board([['o', 'o'], ['o', 'o']], {'A': 1, 'B': 0, 'C': 0},
+                  [(1, 0, 1, 1)], [(0, 3)])
+    board_with_blocks = apply_blocks_to_board(board, {})
+    assert board_with_blocks.blocks == {}
+
+    # Solve both boards using our solver function
+    expected = {(0, 0): None, (0, 1): 'A', (1, 0): None, (1, 1): None}
+    assert solve(board) == expected
+    assert solve(board_with_blocks) == expected
+
+    # Check that the given board is not changed
+    assert board_with_blocks.grid == [['o', 'o'], ['o', 'o']]
+    assert board_with_blocks.blocks == {}